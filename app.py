@@ -1,5 +1,9 @@
 import os
 import base64
+import time
+import datetime as dt
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import pandas as pd
@@ -20,6 +24,11 @@ MARIO_FONT = Path("assets/MarioFont.ttf")          # optional; you supply
 
 AUTOREFRESH_SECONDS = 5
 
+# Thumbnail sizes used on the leaderboard cards
+PLAYER_IMG_SIZE = (70, 100)
+CHARACTER_IMG_SIZE = (80, 80)
+IMAGE_WARMUP_WORKERS = 8
+
 CHARACTER_COLORS = {
     "mario": "#ff4b4b",
     "luigi": "#4caf50",
@@ -234,8 +243,13 @@ inject_theme()
 
 # ---------- DATA HELPERS ----------
 
+def get_data_version():
+    """Modification time of the workbook – changes every time it is saved."""
+    return DATA_FILE.stat().st_mtime if DATA_FILE.exists() else None
+
+
 @st.cache_data(ttl=5)
-def load_data():
+def load_data(version=None):
     if not DATA_FILE.exists():
         return pd.DataFrame(), pd.DataFrame()
 
@@ -304,7 +318,7 @@ def format_seconds(t):
 def build_long_entries(results, players):
     """
     Turn results (p1, p2, time, character, date) into one row per player:
-    columns: player, time_seconds, character, date, picture, service line, location
+    columns: player, partner, time_seconds, character, date, picture, service line, location
     """
     if results.empty or players.empty:
         return pd.DataFrame()
@@ -314,8 +328,8 @@ def build_long_entries(results, players):
     if "date" in results.columns:
         cols.append("date")  # include date if present
 
-    long_p1 = results[["p1"] + cols].rename(columns={"p1": "player"})
-    long_p2 = results[["p2"] + cols].rename(columns={"p2": "player"})
+    long_p1 = results[["p1", "p2"] + cols].rename(columns={"p1": "player", "p2": "partner"})
+    long_p2 = results[["p2", "p1"] + cols].rename(columns={"p2": "player", "p1": "partner"})
     long_all = pd.concat([long_p1, long_p2], ignore_index=True)
 
     # Merge player info
@@ -325,6 +339,190 @@ def build_long_entries(results, players):
     return merged
 
 
+def canonical_pair(a, b):
+    """Sort names so (A,B) and (B,A) are the same."""
+    return tuple(sorted([str(a).strip(), str(b).strip()]))
+
+
+@st.cache_resource(max_entries=4)
+def build_results_index(version, _results):
+    """
+    Build the leaderboard index once per data version:
+      - "board":     all-time leaderboard, fastest entry per pair
+      - "timeline":  dated results only, sorted by timestamp for range slicing
+      - "has_dates": whether the workbook has a date column at all
+      - "has_times": whether any date carries a time of day
+    Shared across sessions – treat it as read-only.
+    """
+    has_dates = "date" in _results.columns
+    if _results.empty:
+        return {
+            "board": pd.DataFrame(),
+            "timeline": pd.DataFrame(),
+            "has_dates": has_dates,
+            "has_times": False,
+        }
+
+    indexed = _results.copy()
+    indexed["pair_key"] = [canonical_pair(a, b) for a, b in zip(indexed["p1"], indexed["p2"])]
+
+    if has_dates:
+        # Same parsing rules as the stats page (dd/mm/yyyy)
+        indexed["timestamp"] = pd.to_datetime(indexed["date"], errors="coerce", dayfirst=True)
+    else:
+        indexed["timestamp"] = pd.NaT
+
+    timeline = (
+        indexed.dropna(subset=["timestamp"])
+        .sort_values("timestamp", kind="stable")
+        .reset_index(drop=True)
+    )
+    stamps = timeline["timestamp"]
+    return {
+        "board": fastest_per_pair(indexed),
+        "timeline": timeline,
+        "has_dates": has_dates,
+        # Excel date-only cells parse to midnight, which hour windows can't use
+        "has_times": bool((stamps != stamps.dt.normalize()).any()),
+    }
+
+
+def slice_window(timeline, start=None, end=None):
+    """Rows with start <= timestamp < end, found by binary search on the sorted index."""
+    if timeline.empty:
+        return timeline
+    stamps = timeline["timestamp"]
+    lo = stamps.searchsorted(pd.Timestamp(start), side="left") if start is not None else 0
+    hi = stamps.searchsorted(pd.Timestamp(end), side="left") if end is not None else len(timeline)
+    return timeline.iloc[lo:hi]
+
+
+def fastest_per_pair(results):
+    """Keep only the fastest entry per pair, fastest first."""
+    if results.empty:
+        return results
+    return (
+        results.sort_values("time_seconds", ascending=True, kind="stable")
+        .drop_duplicates(subset=["pair_key"], keep="first")
+        .reset_index(drop=True)
+    )
+
+
+def leaderboard_window_bounds(window, hours=None, date_range=None, now=None):
+    """Translate a sidebar window choice into (start, end); None means unbounded."""
+    now = now or dt.datetime.now()
+    if window == "Today":
+        start = dt.datetime.combine(now.date(), dt.time.min)
+        return start, start + dt.timedelta(days=1)
+    if window == "Last N hours":
+        return now - dt.timedelta(hours=hours), None
+    if window == "Custom range":
+        if not date_range:
+            # Range still being picked – empty window rather than falling back to all time
+            return now, now
+        first, last = date_range[0], date_range[-1]
+        return (
+            dt.datetime.combine(first, dt.time.min),
+            dt.datetime.combine(last, dt.time.min) + dt.timedelta(days=1),
+        )
+    return None, None
+
+
+@st.cache_resource(max_entries=4)
+def build_stats_index(version, _long, _results):
+    """
+    Precompute the player and character stats pages once per data version.
+    Everything is keyed by player / character so page lookups are dict hits:
+      - "players":           one summary row per player
+      - "player_history":    player -> runs in date order with running best
+      - "player_characters": player -> best time and runs per character
+      - "characters":        one summary row per character
+    Shared across sessions – treat it as read-only.
+    """
+    empty = {
+        "players": pd.DataFrame(),
+        "player_history": {},
+        "player_characters": {},
+        "characters": pd.DataFrame(),
+    }
+    if _long.empty or _results.empty:
+        return empty
+
+    runs = _long.dropna(subset=["player", "time_seconds"]).copy()
+    if runs.empty:
+        return empty
+
+    if "date" in runs.columns:
+        runs["timestamp"] = pd.to_datetime(runs["date"], errors="coerce", dayfirst=True)
+    else:
+        runs["timestamp"] = pd.NaT
+
+    # Undated runs keep their sheet order and go after the dated ones
+    runs["run_order"] = range(len(runs))
+    runs = runs.sort_values(["player", "timestamp", "run_order"], kind="stable", na_position="last")
+    by_player = runs.groupby("player", sort=False)["time_seconds"]
+    runs["best_so_far"] = by_player.cummin()
+
+    # ---- Player summary ----
+    players = by_player.agg(
+        runs="size",
+        best_time="min",
+        avg_time="mean",
+        first_time="first",
+    )
+    players["improvement"] = players["first_time"] - players["best_time"]
+
+    pair_best = (
+        runs.dropna(subset=["partner"])
+        .groupby(["player", "partner"], sort=False)["time_seconds"]
+        .min()
+        .reset_index()
+    )
+    if not pair_best.empty:
+        best_partner = pair_best.loc[pair_best.groupby("player")["time_seconds"].idxmin()]
+        players["best_partner"] = best_partner.set_index("player")["partner"]
+    else:
+        players["best_partner"] = None
+
+    player_characters = (
+        runs.groupby(["player", "character"], sort=False)["time_seconds"]
+        .agg(best_time="min", runs="size")
+        .reset_index()
+        .sort_values(["player", "best_time"])
+    )
+
+    # ---- Character summary (one row per result, not per player) ----
+    results = _results.dropna(subset=["character"])
+    characters = results.groupby("character")["time_seconds"].agg(
+        runs="size",
+        best_time="min",
+        avg_time="mean",
+    )
+    characters["usage_share"] = characters["runs"] / characters["runs"].sum()
+    fastest = results.dropna(subset=["time_seconds"])
+    if not fastest.empty:
+        best_rows = fastest.loc[fastest.groupby("character")["time_seconds"].idxmin()]
+        characters["best_pair"] = (
+            best_rows["p1"].astype(str) + " & " + best_rows["p2"].astype(str)
+        ).set_axis(best_rows["character"])
+    else:
+        characters["best_pair"] = None
+    characters = characters.sort_values("runs", ascending=False)
+
+    return {
+        "players": players.sort_index(),
+        "player_history": {
+            player: group[["timestamp", "time_seconds", "best_so_far", "partner", "character"]]
+            for player, group in runs.groupby("player", sort=False)
+        },
+        "player_characters": {
+            player: group.drop(columns="player").reset_index(drop=True)
+            for player, group in player_characters.groupby("player", sort=False)
+        },
+        "characters": characters,
+    }
+
+
 
 def load_image_safe(path: Path, size=None):
     try:
@@ -336,6 +534,91 @@ def load_image_safe(path: Path, size=None):
         return None
 
 
+# ---------- THUMBNAIL CACHE ----------
+
+THUMBNAIL_MISS = object()
+
+@st.cache_resource
+def get_thumbnail_cache():
+    """Process-wide cache of resized images, shared across sessions and reruns."""
+    return {"images": {}, "lock": threading.Lock()}
+
+
+def thumbnail_key(path: Path, size):
+    # mtime in the key so a replaced photo is picked up without a restart
+    try:
+        mtime = path.stat().st_mtime
+    except OSError:
+        return None
+    return (str(path), size, mtime)
+
+
+def load_thumbnail(path: Path, size):
+    """
+    Return the resized RGBA image for path, decoding it only on a cache miss.
+    Files that fail to load are cached as None until their mtime changes.
+    """
+    key = thumbnail_key(path, size)
+    if key is None:
+        return None
+
+    cache = get_thumbnail_cache()
+    # Look up with a sentinel so a cached failure (None) still counts as a hit
+    img = cache["images"].get(key, THUMBNAIL_MISS)
+    if img is not THUMBNAIL_MISS:
+        return img
+
+    img = load_image_safe(path, size=size)
+    with cache["lock"]:
+        # Drop images from older versions of the same file so replaced photos don't pile up
+        stale = [k for k in cache["images"] if k[:2] == key[:2] and k != key]
+        for k in stale:
+            del cache["images"][k]
+        cache["images"][key] = img
+    return img
+
+
+def character_image_path(character):
+    name = str(character).strip().lower().replace(" ", "_")
+    return CHARACTER_PIC_DIR / f"{name}.png"
+
+
+def collect_image_jobs(results, players):
+    """All (path, size) pairs the leaderboard can reference for this data version."""
+    jobs = set()
+    if not players.empty and "picture" in players.columns:
+        for filename in players["picture"].dropna().unique():
+            jobs.add((PLAYER_PIC_DIR / str(filename), PLAYER_IMG_SIZE))
+    if not results.empty and "character" in results.columns:
+        for character in results["character"].dropna().unique():
+            jobs.add((character_image_path(character), CHARACTER_IMG_SIZE))
+    return jobs
+
+
+def warm_image_cache(results, players):
+    """
+    Decode and resize every referenced image in a bounded thread pool so the
+    card loop only hits the cache. Returns (images prepared, seconds taken).
+    """
+    started = time.perf_counter()
+    cache = get_thumbnail_cache()
+
+    prepared = 0
+    pending = []
+    for path, size in collect_image_jobs(results, players):
+        key = thumbnail_key(path, size)
+        # Missing files are skipped here; the render path reports them
+        if key is not None and key not in cache["images"]:
+            pending.append((path, size))
+
+    if pending:
+        workers = min(IMAGE_WARMUP_WORKERS, len(pending))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            images = pool.map(lambda job: load_thumbnail(*job), pending)
+            prepared = sum(img is not None for img in images)
+
+    return prepared, time.perf_counter() - started
+
 
 def get_player_image(filename):
     if pd.isna(filename):
@@ -349,21 +632,18 @@ def get_player_image(filename):
         print("📁 Available files:", list(PLAYER_PIC_DIR.glob("*")))
         return None
 
-    return load_image_safe(path, size=(70, 100))
+    return load_thumbnail(path, PLAYER_IMG_SIZE)
 
 
 def get_character_image(character):
     if pd.isna(character):
         return None
-    name = str(character).strip().lower().replace(" ", "_")
-    path = CHARACTER_PIC_DIR / f"{name}.png"
+    path = character_image_path(character)
     if not path.exists():
         st.warning(f"⚠️ Missing character image: {path}")
         print("⚠️ Missing character image:", path)
         return None
-    img = Image.open(path).convert("RGBA")
-    img = img.resize((80, 80), Image.LANCZOS)
-    return img
+    return load_thumbnail(path, CHARACTER_IMG_SIZE)
 
 
 # ---------- STATE FOR ANIMATIONS ----------
@@ -395,39 +675,55 @@ st.markdown(
 
 st.title("🏁 Mario Kart Tournament Leaderboard")
 
-page = st.sidebar.radio("Page", ["Leaderboard", "Service line stats"])
+page = st.sidebar.radio(
+    "Page", ["Leaderboard", "Player stats", "Character stats", "Service line stats"]
+)
 
-results_df, players_df = load_data()
+data_version = get_data_version()
+results_df, players_df = load_data(data_version)
 long_df = build_long_entries(results_df, players_df)
+results_index = build_results_index(data_version, results_df)
+
+# Prepare every thumbnail up front instead of one at a time inside the card loop
+warmed, warm_seconds = warm_image_cache(results_df, players_df)
+if warmed:
+    print(f"🖼️ Warmed {warmed} images in {warm_seconds:.2f}s")
+    st.sidebar.caption(f"🖼️ Prepared {warmed} images in {warm_seconds:.2f}s")
 
 
 # ---------- LEADERBOARD PAGE ----------
 
 if page == "Leaderboard":
-    st.subheader("Live Leaderboard")
+    windows = ["All time", "Today", "Custom range"]
+    if results_index["has_times"]:
+        windows.insert(2, "Last N hours")
+    window = st.sidebar.radio("Leaderboard window", windows)
+    if not results_index["has_times"]:
+        st.sidebar.caption("Rolling hour windows need a time of day in the 'date' column.")
+    window_hours = None
+    window_range = None
+    if window == "Last N hours":
+        window_hours = st.sidebar.slider("Hours", min_value=1, max_value=72, value=3)
+    elif window == "Custom range":
+        today = dt.date.today()
+        window_range = st.sidebar.date_input("Date range", value=(today, today))
+
+    st.subheader("Live Leaderboard" if window == "All time" else f"Live Leaderboard – {window}")
     if results_df.empty:
         st.info("No results yet – add rows to the Excel file to get started.")
+    elif window != "All time" and not results_index["has_dates"]:
+        st.info("No 'date' column found in the data — add it to use time-window leaderboards.")
     else:
-        # Sort by time ascending (fastest at top)
         # === LEADERBOARD DEDUPLICATION: fastest entry per pair ONLY ===
+        # All-time board is precomputed; windows slice the date-sorted index
+        if window == "All time":
+            results_sorted = results_index["board"]
+        else:
+            start, end = leaderboard_window_bounds(window, hours=window_hours, date_range=window_range)
+            results_sorted = fastest_per_pair(slice_window(results_index["timeline"], start, end))
 
-        def canonical_pair(a, b):
-            """Sort names so (A,B) and (B,A) are the same."""
-            return tuple(sorted([str(a).strip(), str(b).strip()]))
-
-        # Create a canonical pair key
-        results_df["pair_key"] = results_df.apply(
-            lambda r: canonical_pair(r["p1"], r["p2"]), axis=1
-        )
-
-        # Sort by fastest first
-        leaderboard_df = results_df.sort_values("time_seconds", ascending=True)
-
-        # Drop duplicates: keep only the fastest entry per pair
-        leaderboard_df = leaderboard_df.drop_duplicates(subset=["pair_key"], keep="first")
-
-        # Reset index for clean iteration
-        results_sorted = leaderboard_df.reset_index(drop=True)
+        if results_sorted.empty:
+            st.info("No results in this time window yet.")
 
         # Determine which entries are new
         current_keys = []
@@ -573,6 +869,80 @@ html, body, * {
         st.session_state["known_entry_keys"] = set(current_keys)
 
 
+# ---------- PLAYER STATS PAGE ----------
+
+if page == "Player stats":
+    st.subheader("Player stats")
+    stats = build_stats_index(data_version, long_df, results_df)
+    player_stats = stats["players"]
+
+    if player_stats.empty:
+        st.info("No entries yet – add results to the Excel file.")
+    else:
+        player = st.selectbox("Player", list(player_stats.index))
+        summary = player_stats.loc[player]
+
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("🏆 Personal best", format_seconds(summary["best_time"]))
+        col2.metric("🏁 Runs", int(summary["runs"]))
+        col3.metric("⏱ Average", format_seconds(summary["avg_time"]))
+        col4.metric("📉 Improvement", format_seconds(summary["improvement"]))
+
+        if pd.notna(summary["best_partner"]):
+            st.markdown(f"**🤝 Best partner:** {summary['best_partner']}")
+
+        history = stats["player_history"][player]
+        dated = history.dropna(subset=["timestamp"])
+        if len(dated) > 1:
+            st.markdown("### 📈 Times Over Time")
+            st.line_chart(
+                dated.set_index("timestamp")[["time_seconds", "best_so_far"]],
+                height=300,
+                use_container_width=True,
+            )
+
+        st.markdown("### 🍄 Best Time per Character")
+        per_char = stats["player_characters"].get(player, pd.DataFrame(columns=["character", "best_time", "runs"])).copy()
+        per_char["best_time"] = per_char["best_time"].apply(format_seconds)
+        st.dataframe(per_char, use_container_width=True)
+
+
+# ---------- CHARACTER STATS PAGE ----------
+
+if page == "Character stats":
+    st.subheader("Character stats")
+    stats = build_stats_index(data_version, long_df, results_df)
+    char_stats = stats["characters"]
+
+    if char_stats.empty:
+        st.info("No entries yet – add results to the Excel file.")
+    else:
+        character = st.selectbox("Character", list(char_stats.index))
+        summary = char_stats.loc[character]
+
+        col1, col2 = st.columns([1, 3])
+        with col1:
+            char_img = get_character_image(character)
+            if char_img is not None:
+                st.image(char_img)
+        with col2:
+            c1, c2, c3 = st.columns(3)
+            c1.metric("🏆 Best time", format_seconds(summary["best_time"]))
+            c2.metric("🏁 Runs", int(summary["runs"]))
+            c3.metric("📊 Usage", f"{summary['usage_share']:.0%}")
+            if pd.notna(summary["best_pair"]):
+                st.markdown(f"**🤝 Fastest pair:** {summary['best_pair']}")
+
+        st.markdown("### 🍄 All Characters")
+        table = char_stats.reset_index()
+        table["best_time"] = table["best_time"].apply(format_seconds)
+        table["avg_time"] = table["avg_time"].apply(format_seconds)
+        table["usage_share"] = table["usage_share"].map("{:.0%}".format)
+        st.dataframe(table, use_container_width=True)
+
+        st.bar_chart(char_stats["usage_share"], height=300)
+
+
 # ---------- SERVICE LINE STATS PAGE ----------
 
 if page == "Service line stats":